@@ -13,6 +13,9 @@
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 import argparse
+import logging
+import sys
+from proteus.core import set_gdal_config_options
 from proteus.dswx_hls import compare_dswx_hls_products
 
 
@@ -35,6 +38,17 @@ def main():
 
     args = parser.parse_args()
 
+    # comparison results are reported through the `dswx_hls` logger.
+    # A plain stdout handler is used instead of `create_logger()`, which
+    # would also redirect stdout and stderr to the logger
+    logger = logging.getLogger('dswx_hls')
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+
+    set_gdal_config_options()
+
     file_1 = args.input_file[0]
     file_2 = args.input_file[1]
 
@@ -14,6 +14,7 @@
 
 import logging
 import mimetypes
+from proteus.core import set_gdal_config_options
 from proteus.dswx_hls import (
     get_dswx_hls_cli_parser,
     generate_dswx_layers,
@@ -30,6 +31,11 @@ def main():
 
     create_logger(args.log_file, args.full_log_formatting)
 
+    # HLS bands are usually stored in directories with many other files.
+    # Among other options, prevent GDAL from listing the directory contents
+    # every time a file is opened
+    set_gdal_config_options()
+
     mimetypes.add_type("text/yaml", ".yaml", strict=True)
     flag_first_file_is_text = 'text' in mimetypes.guess_type(
         args.input_list[0])[0]
@@ -4,6 +4,40 @@ import tempfile
 import logging
 from osgeo import gdal, osr
 
+'''
+GDAL block cache size (in bytes) used when GDAL_CACHEMAX is not set
+'''
+GDAL_CACHE_MAX_BYTES = 1 << 30
+
+'''
+GDAL configuration options set by `set_gdal_config_options()`, unless
+already defined by the user (e.g., as environment variables)
+'''
+GDAL_CONFIG_OPTIONS_DICT = {
+    # Do not list the directory contents every time a file is opened (sidecar
+    # files are still probed individually)
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'TRUE',
+    # Decode compressed GeoTIFF blocks using multiple threads
+    'GDAL_NUM_THREADS': 'ALL_CPUS',
+    # Cache reads from the virtual file systems (e.g., /vsicurl/)
+    'VSI_CACHE': 'TRUE'
+}
+
+
+def set_gdal_config_options():
+    """Set GDAL block cache size and configuration options used to
+       speed up reading and writing rasters. Options already set by the
+       user are not modified.
+    """
+    if gdal.GetConfigOption('GDAL_CACHEMAX') is None:
+        gdal.SetCacheMax(GDAL_CACHE_MAX_BYTES)
+
+    for key, value in GDAL_CONFIG_OPTIONS_DICT.items():
+        if gdal.GetConfigOption(key) is not None:
+            continue
+        gdal.SetConfigOption(key, value)
+
+
 def save_as_cog(filename, scratch_dir = '.', logger = None,
                 flag_compress=True, ovr_resamp_algorithm=None):
     """Save (overwrite) a GeoTIFF file as a cloud-optimized GeoTIFF.
@@ -46,8 +80,10 @@ def save_as_cog(filename, scratch_dir = '.', logger = None,
 
     del gdal_ds  # close the dataset (Python object and pointers)
     external_overview_file = filename + '.ovr'
-    if os.path.isfile(external_overview_file):
+    try:
         os.remove(external_overview_file)
+    except FileNotFoundError:
+        pass
 
     logger.info('    step 2: save as COG')
     temp_file = tempfile.NamedTemporaryFile(
@@ -3,6 +3,8 @@ import logging
 import tempfile
 import os
 import glob
+import uuid
+import concurrent.futures
 import numpy as np
 import argparse
 import yamale
@@ -10,7 +12,7 @@ from datetime import datetime
 from collections import OrderedDict
 from ruamel.yaml import YAML as ruamel_yaml
 from osgeo.gdalconst import GDT_Float32, GDT_Byte
-from osgeo import gdal, osr, ogr
+from osgeo import gdal, gdal_array, osr, ogr
 from scipy.ndimage import binary_dilation
 import scipy
 
@@ -46,6 +48,7 @@ SCALE_FACTOR = 0.0001
 AEROSOL_REMAPPING_MAX_NIR = 0.1 / SCALE_FACTOR
 
 COMPARE_DSWX_HLS_PRODUCTS_ERROR_TOLERANCE = 1e-6
+COMPARE_DSWX_HLS_PRODUCTS_BLOCK_NLINES = 512
 
 UINT8_FILL_VALUE = 255
 OCEAN_MASKED_RGBA = (0, 0, 127, 0)
@@ -57,6 +60,21 @@ operations taking place near the edge of the DEM
 '''
 DEM_MARGIN_IN_PIXELS = 50
 
+'''
+GeoTIFF creation options for layers written before being converted to
+cloud-optimized GeoTIFFs (COGs) by `save_as_cog()`. Using the same tiling as
+the COG lets overviews and the COG be built reading each block only once
+'''
+GEOTIFF_CREATION_OPTIONS_LIST = ['TILED=YES',
+                                 'BLOCKXSIZE=512',
+                                 'BLOCKYSIZE=512']
+
+'''
+Number of lines processed at a time by the diagnostic tests. Smaller blocks
+bound the size of the intermediate arrays (e.g., spectral indices)
+'''
+DIAGNOSTIC_TESTS_BLOCK_NLINES = 512
+
 logger = logging.getLogger('dswx_hls')
 
 l30_v1_band_dict = {'blue': 'band02',
@@ -707,18 +725,70 @@ def _get_prefix_str(flag_same, flag_all_ok):
     return '[OK]   ' if flag_same else '[FAIL] '
 
 
+def _read_band_into_buffer(gdal_band, buffer = None, yoff = 0,
+                           ysize = None):
+    """Read GDAL band lines into a buffer, reusing the buffer if it is large
+       enough and its data type matches the band's
+
+       Parameters
+       ----------
+       gdal_band : gdal.Band
+            GDAL band
+       buffer : numpy.ndarray (optional)
+            Buffer from a previous read
+       yoff : int (optional)
+            First line to read
+       ysize : int (optional)
+            Number of lines to read. Defaults to all lines starting from
+            `yoff`
+
+       Returns
+       -------
+       buffer : numpy.ndarray
+            Buffer whose first `ysize` lines contain the band lines
+    """
+    if ysize is None:
+        ysize = gdal_band.YSize - yoff
+    shape = (ysize, gdal_band.XSize)
+    dtype = gdal_array.GDALTypeCodeToNumericTypeCode(gdal_band.DataType)
+    if (buffer is None or buffer.shape[0] < ysize or
+            buffer.shape[1] != shape[1] or buffer.dtype != dtype):
+        buffer = np.empty(shape, dtype=dtype)
+    gdal_band.ReadAsArray(xoff=0, yoff=yoff, win_xsize=shape[1],
+                          win_ysize=ysize, buf_obj=buffer[:ysize])
+    return buffer
+
+
+def _log_comparison(flag_same, message):
+    """Log the result of a comparison between DSWx-HLS products. Failed
+       comparisons are logged as warnings, so that they are reported even
+       if the logger is not configured to show informational messages.
+
+       Parameters
+       ----------
+       flag_same : bool
+            Flag indicating whether the comparison succeeded
+       message : str
+            Message to be logged
+    """
+    if flag_same:
+        logger.info(message)
+    else:
+        logger.warning(message)
+
+
 def compare_dswx_hls_products(file_1, file_2):
     if not os.path.isfile(file_1):
-        print(f'ERROR file not found: {file_1}')
+        logger.error(f'ERROR file not found: {file_1}')
         return False
 
     if not os.path.isfile(file_2):
-        print(f'ERROR file not found: {file_2}')
+        logger.error(f'ERROR file not found: {file_2}')
         return False
 
-    print('Comparing files:')
-    print(f'    file 1: {file_1}')
-    print(f'    file 2: {file_2}')
+    logger.info('Comparing files:')
+    logger.info(f'    file 1: {file_1}')
+    logger.info(f'    file 2: {file_2}')
 
     flag_all_ok = [True]
 
@@ -737,38 +807,70 @@ def compare_dswx_hls_products(file_1, file_2):
     flag_same_nbands =  nbands_1 == nbands_2
     flag_same_nbands_str = _get_prefix_str(flag_same_nbands, flag_all_ok)
     prefix = ' ' * 7
-    print(f'{flag_same_nbands_str}Comparing number of bands')
+    _log_comparison(flag_same_nbands,
+                    f'{flag_same_nbands_str}Comparing number of bands')
     if not flag_same_nbands:
-        print(prefix + f'Input 1 has {nbands_1} bands and input 2'
-              f' has {nbands_2} bands')
+        logger.warning(prefix + f'Input 1 has {nbands_1} bands and input 2'
+                       f' has {nbands_2} bands')
         return False
 
     # compare array values
-    print('Comparing DSWx bands...')
+    logger.info('Comparing DSWx bands...')
+    buffer_1 = None
+    buffer_2 = None
     for b in range(1, nbands_1 + 1):
         gdal_band_1 = layer_gdal_dataset_1.GetRasterBand(b)
         gdal_band_2 = layer_gdal_dataset_2.GetRasterBand(b)
-        image_1 = gdal_band_1.ReadAsArray()
-        image_2 = gdal_band_2.ReadAsArray()
-        flag_bands_are_equal = np.allclose(
-            image_1, image_2, atol=COMPARE_DSWX_HLS_PRODUCTS_ERROR_TOLERANCE,
-            equal_nan=True)
+        flag_bands_are_equal = (
+            gdal_band_1.XSize == gdal_band_2.XSize and
+            gdal_band_1.YSize == gdal_band_2.YSize)
+
+        # compare bands over blocks of lines, stopping at the first block
+        # that differs
+        line_start = 0
+        while flag_bands_are_equal and line_start < gdal_band_1.YSize:
+            nlines = min(COMPARE_DSWX_HLS_PRODUCTS_BLOCK_NLINES,
+                         gdal_band_1.YSize - line_start)
+            buffer_1 = _read_band_into_buffer(gdal_band_1, buffer_1,
+                                              line_start, nlines)
+            buffer_2 = _read_band_into_buffer(gdal_band_2, buffer_2,
+                                              line_start, nlines)
+            image_1 = buffer_1[:nlines]
+            image_2 = buffer_2[:nlines]
+            flag_bands_are_equal = np.allclose(
+                image_1, image_2,
+                atol=COMPARE_DSWX_HLS_PRODUCTS_ERROR_TOLERANCE,
+                equal_nan=True)
+            if flag_bands_are_equal:
+                line_start += nlines
+
         flag_bands_are_equal_str = _get_prefix_str(flag_bands_are_equal,
                                                    flag_all_ok)
-        print(f'{flag_bands_are_equal_str}     Band {b} -'
-              f' {gdal_band_1.GetDescription()}"')
-        if not flag_bands_are_equal:
-            _print_first_value_diff(image_1, image_2, prefix)
+        _log_comparison(flag_bands_are_equal,
+                        f'{flag_bands_are_equal_str}     Band {b} -'
+                        f' {gdal_band_1.GetDescription()}"')
+        if flag_bands_are_equal:
+            continue
+        if (gdal_band_1.XSize != gdal_band_2.XSize or
+                gdal_band_1.YSize != gdal_band_2.YSize):
+            logger.warning(prefix + f'     * input 1 has dimensions'
+                           f' {gdal_band_1.XSize} x {gdal_band_1.YSize}'
+                           f' whereas input 2 has dimensions'
+                           f' {gdal_band_2.XSize} x {gdal_band_2.YSize}.')
+            continue
+        _log_first_value_diff(image_1, image_2, prefix,
+                              line_offset=line_start)
 
     # compare geotransforms
     flag_same_geotransforms = np.array_equal(geotransform_1, geotransform_2)
     flag_same_geotransforms_str = _get_prefix_str(flag_same_geotransforms,
                                                   flag_all_ok)
-    print(f'{flag_same_geotransforms_str}Comparing geotransform')
+    _log_comparison(flag_same_geotransforms,
+                    f'{flag_same_geotransforms_str}Comparing geotransform')
     if not flag_same_geotransforms:
-        print(prefix + f'* input 1 geotransform with content "{geotransform_1}"'
-              f' differs from input 2 geotransform with content'
-              f' "{geotransform_2}".')
+        logger.warning(prefix + f'* input 1 geotransform with content'
+                       f' "{geotransform_1}" differs from input 2'
+                       f' geotransform with content "{geotransform_2}".')
 
     # compare metadata
     metadata_error_message, flag_same_metadata = \
@@ -776,10 +878,11 @@ def compare_dswx_hls_products(file_1, file_2):
 
     flag_same_metadata_str = _get_prefix_str(flag_same_metadata,
                                              flag_all_ok)
-    print(f'{flag_same_metadata_str}Comparing metadata')
+    _log_comparison(flag_same_metadata,
+                    f'{flag_same_metadata_str}Comparing metadata')
 
     if not flag_same_metadata:
-        print(prefix + metadata_error_message)
+        logger.warning(prefix + metadata_error_message)
 
     return flag_all_ok[0]
 
@@ -802,27 +905,27 @@ def _compare_dswx_hls_metadata(metadata_1, metadata_2):
             f'* input 1 metadata has {len(metadata_1.keys())} entries'
             f' whereas input 2 metadata has {len(metadata_2.keys())} entries.')
 
-        set_1_m_2 = set(metadata_1.keys()) - set(metadata_2.keys())
+        set_1_m_2 = metadata_1.keys() - metadata_2.keys()
         if len(set_1_m_2) > 0:
             metadata_error_message += (' Input 1 metadata has extra entries'
                                        ' with keys:'
                                        f' {", ".join(set_1_m_2)}.')
-        set_2_m_1 = set(metadata_2.keys()) - set(metadata_1.keys())
+        set_2_m_1 = metadata_2.keys() - metadata_1.keys()
         if len(set_2_m_1) > 0:
             metadata_error_message += (' Input 2 metadata has extra entries'
                                        ' with keys:'
                                        f' {", ".join(set_2_m_1)}.')
     else:
         for k1, v1, in metadata_1.items():
-            if k1 not in metadata_2.keys():
+            if k1 not in metadata_2:
                 flag_same_metadata = False
                 metadata_error_message = (
                     f'* the metadata key {k1} is present in'
                     ' but it is not present in input 2')
                 break
             # Exclude metadata fields that are not required to be the same
-            if k1 in ['PROCESSING_DATETIME', 'DEM_SOURCE', 'LANDCOVER_SOURCE',
-                      'WORLDCOVER_SOURCE', 'SOFTWARE_VERSION', 'SENSOR']:
+            if k1 in {'PROCESSING_DATETIME', 'DEM_SOURCE', 'LANDCOVER_SOURCE',
+                      'WORLDCOVER_SOURCE', 'SOFTWARE_VERSION', 'SENSOR'}:
                 continue
             if metadata_2[k1] != v1:
                 flag_same_metadata = False
@@ -834,9 +937,9 @@ def _compare_dswx_hls_metadata(metadata_1, metadata_2):
     return metadata_error_message, flag_same_metadata
 
 
-def _print_first_value_diff(image_1, image_2, prefix):
+def _log_first_value_diff(image_1, image_2, prefix, line_offset = 0):
     """
-    Print first value difference between two images.
+    Log (as a warning) first value difference between two images.
 
        Parameters
        ----------
@@ -845,23 +948,51 @@ def _print_first_value_diff(image_1, image_2, prefix):
        image_2: numpy.ndarray
             Second input image
        prefix: str
-            Prefix to the message printed to the user
+            Prefix to the logged message
+       line_offset: int (optional)
+            Line offset of the images (e.g., when comparing blocks of
+            lines), used to report the position of the difference
     """
-    flag_error_found = False
-    for i in range(image_1.shape[0]):
-        for j in range(image_1.shape[1]):
-            if (abs(image_1[i, j] - image_2[i, j]) <=
-                    COMPARE_DSWX_HLS_PRODUCTS_ERROR_TOLERANCE):
-                continue
-            print(prefix + f'     * input 1 has value'
-                  f' "{image_1[i, j]}" in position'
-                  f' (x: {j}, y: {i})'
-                  f' whereas input 2 has value "{image_2[i, j]}"'
-                  ' in the same position.')
-            flag_error_found = True
-            break
-        if flag_error_found:
-            break
+    flag_diff_array = ~(np.abs(image_1 - image_2) <=
+                        COMPARE_DSWX_HLS_PRODUCTS_ERROR_TOLERANCE)
+    if not np.any(flag_diff_array):
+        return
+    i, j = np.unravel_index(np.argmax(flag_diff_array),
+                            flag_diff_array.shape)
+    logger.warning(prefix + f'     * input 1 has value'
+                   f' "{image_1[i, j]}" in position'
+                   f' (x: {j}, y: {i + line_offset})'
+                   f' whereas input 2 has value "{image_2[i, j]}"'
+                   ' in the same position.')
+
+
+def _isin(image, values):
+    """Return a boolean mask identifying the elements of `image` that are
+       equal to any of the elements of `values`. For uint8 and uint16
+       images, the mask is computed with a single lookup into a table
+       indexed by the pixel values. Otherwise, `np.isin()` is used.
+
+       Parameters
+       ----------
+       image: numpy.ndarray
+              Input image
+       values: list(int)
+              Values to test against
+
+       Returns
+       -------
+       mask : numpy.ndarray
+              Boolean mask with the same shape as `image`
+    """
+    if image.dtype != np.uint8 and image.dtype != np.uint16:
+        return np.isin(image, values)
+
+    lut_size = np.iinfo(image.dtype).max + 1
+    values = np.asarray(values, dtype=np.int64).ravel()
+    values = values[(values >= 0) & (values < lut_size)]
+    lut = np.zeros(lut_size, dtype=np.bool_)
+    lut[values] = True
+    return lut[image]
 
 
 def decimate_by_summation(image, size_y, size_x):
@@ -874,7 +1005,7 @@ def decimate_by_summation(image, size_y, size_x):
               Input image
        size_y: int
               Number of looks in the Y-direction (row)
-       size_y: int
+       size_x: int
               Number of looks in the X-direction (column)
 
        Returns
@@ -883,6 +1014,14 @@ def decimate_by_summation(image, size_y, size_x):
               Output image
 
     """
+    length, width = image.shape
+    if length % size_y == 0 and width % size_x == 0:
+        # the image can be split into whole windows: sum each window
+        # with a single reduction over a (reshaped) view of the image
+        return image.reshape(length // size_y, size_y,
+                             width // size_x, size_x).sum(
+                                 axis=(1, 3), dtype=image.dtype)
+
     for i in range(size_y):
         for j in range(size_x):
             image_slice = image[i::size_y, j::size_x]
@@ -896,10 +1035,6 @@ def decimate_by_summation(image, size_y, size_x):
             out_image += current_image
     return out_image
 
-def _update_landcover_array(conglomerate_array, agg_sum, threshold,
-        classification_val):
-    conglomerate_array[agg_sum >= threshold] = classification_val
-
 
 def create_landcover_mask(copernicus_landcover_file,
                           worldcover_file, worldcover_file_description,
@@ -958,16 +1093,11 @@ def create_landcover_mask(copernicus_landcover_file,
         logger.error(f'ERROR file not found: {worldcover_file}')
         return
 
-    # Reproject Copernicus land cover    
-    copernicus_landcover_reprojected_file = tempfile.NamedTemporaryFile(
-        dir=scratch_dir, suffix='.tif').name
-
-    copernicus_landcover_array = _warp(copernicus_landcover_file,
-        geotransform, projection, length, width,
-        scratch_dir, resample_algorithm='nearest',
-        relocated_file=copernicus_landcover_reprojected_file,
-        temp_files_list=temp_files_list)
-    temp_files_list.append(copernicus_landcover_reprojected_file)
+    # Reproject Copernicus land cover and ESA WorldCover concurrently (GDAL
+    # releases the GIL while warping). The relocated files are only read
+    # back into memory, so they are kept in GDAL's in-memory file system
+    copernicus_landcover_reprojected_file = \
+        f'/vsimem/copernicus_landcover_{uuid.uuid4().hex}.tif'
 
     # Reproject ESA Worldcover 10m from geographic (lat/lon) to MGRS (UTM) 10m
     geotransform_up_3 = list(geotransform)
@@ -975,76 +1105,94 @@ def create_landcover_mask(copernicus_landcover_file,
     geotransform_up_3[5] = geotransform[5] / 3  # dy / 3
     length_up_3 = 3 * length
     width_up_3 = 3 * width
-    worldcover_reprojected_up_3_file = tempfile.NamedTemporaryFile(
-        dir=scratch_dir, suffix='.tif').name
-    worldcover_array_up_3 = _warp(worldcover_file, geotransform_up_3,
-        projection, length_up_3, width_up_3,
-        scratch_dir, resample_algorithm='nearest',
-        relocated_file=worldcover_reprojected_up_3_file,
-        temp_files_list=temp_files_list)
-    temp_files_list.append(worldcover_reprojected_up_3_file)
+    worldcover_reprojected_up_3_file = \
+        f'/vsimem/worldcover_up_3_{uuid.uuid4().hex}.tif'
+
+    # Split the available CPUs between the two concurrent warps rather
+    # than letting each of them use all CPUs
+    warp_num_threads = max(1, (os.cpu_count() or 2) // 2)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            copernicus_landcover_future = executor.submit(
+                _warp, copernicus_landcover_file,
+                geotransform, projection, length, width,
+                scratch_dir, resample_algorithm='nearest',
+                relocated_file=copernicus_landcover_reprojected_file,
+                temp_files_list=temp_files_list,
+                num_threads=warp_num_threads)
+            worldcover_up_3_future = executor.submit(
+                _warp, worldcover_file, geotransform_up_3,
+                projection, length_up_3, width_up_3,
+                scratch_dir, resample_algorithm='nearest',
+                relocated_file=worldcover_reprojected_up_3_file,
+                temp_files_list=temp_files_list,
+                num_threads=warp_num_threads)
+            copernicus_landcover_array = copernicus_landcover_future.result()
+            worldcover_array_up_3 = worldcover_up_3_future.result()
+    finally:
+        gdal.Unlink(copernicus_landcover_reprojected_file)
+        gdal.Unlink(worldcover_reprojected_up_3_file)
 
     # Set multilooking parameters
     size_y = 3
     size_x = 3
 
-    # Create water mask
-    logger.info(f'    creating water mask')
+    # Create water, urban-areas, and vegetation masks in a single pass over
+    # the WorldCover array. Each mask is stored in its own 4-bit field of
+    # an uint16 array, so that the three masks can also be decimated
+    # together (the maximum sum over a 3 x 3 window, 9, fits in 4 bits)
+    logger.info(f'    creating water, urban-areas, and vegetation masks')
+    water_bit_shift = 0
+    urban_bit_shift = 4
+    tree_bit_shift = 8
+    worldcover_masks_lut = np.zeros(256, dtype=np.uint16)
+
     # WorldCover class 80: permanent water bodies
     # WorldCover class 90: herbaceous wetland
     # WorldCover class 95: mangroves
-    water_binary_mask = (np.isin(worldcover_array_up_3, [80, 90, 95])).astype(
-        np.uint8)
-    water_aggregate_sum = decimate_by_summation(water_binary_mask,
-                                              size_y, size_x)
-    del water_binary_mask
-
-    # Create urban-areas mask
-    logger.info(f'    creating urban-areas mask')
+    worldcover_masks_lut[[80, 90, 95]] = 1 << water_bit_shift
+
     # WorldCover class 50: built-up
-    urban_binary_mask = (worldcover_array_up_3 == 50).astype(np.uint8)
-    urban_aggregate_sum = decimate_by_summation(urban_binary_mask,
-                                                size_y, size_x)
-    del urban_binary_mask
+    worldcover_masks_lut[50] = 1 << urban_bit_shift
 
-    # Create vegetation mask
-    logger.info(f'    creating vegetation mask')
     # WorldCover class 10: tree cover
-    tree_binary_mask  = (worldcover_array_up_3 == 10).astype(np.uint8)
-    del worldcover_array_up_3
-    tree_aggregate_sum = decimate_by_summation(tree_binary_mask,
-                                               size_y, size_x)
-    del tree_binary_mask
+    worldcover_masks_lut[10] = 1 << tree_bit_shift
 
-    copernicus_forest = np.zeros_like(tree_aggregate_sum, dtype=np.uint8)
+    worldcover_masks = worldcover_masks_lut[worldcover_array_up_3]
+    del worldcover_array_up_3
+    worldcover_masks_aggregate_sum = decimate_by_summation(worldcover_masks,
+                                                           size_y, size_x)
+    del worldcover_masks
+
+    # Unpack the three aggregate sums into the planes of a single uint8
+    # array, reusing one scratch buffer for the bit shifts
+    aggregate_sums = np.empty((3,) + worldcover_masks_aggregate_sum.shape,
+                              dtype=np.uint8)
+    aggregate_sum_scratch = np.empty_like(worldcover_masks_aggregate_sum)
+    for i, bit_shift in enumerate([water_bit_shift, urban_bit_shift,
+                                   tree_bit_shift]):
+        np.right_shift(worldcover_masks_aggregate_sum, bit_shift,
+                       out=aggregate_sum_scratch)
+        np.bitwise_and(aggregate_sum_scratch, 0b1111, out=aggregate_sums[i],
+                       casting='unsafe')
+    del worldcover_masks_aggregate_sum, aggregate_sum_scratch
+    water_aggregate_sum, urban_aggregate_sum, tree_aggregate_sum = \
+        aggregate_sums
 
     logger.info('    CGLS Land Cover 100m forest classes:'
                 f' {forest_mask_landcover_classes}')
 
     if forest_mask_landcover_classes is not None:
-        for copernicus_forest_class in forest_mask_landcover_classes:
-            copernicus_forest |= (copernicus_landcover_array ==
-                                  copernicus_forest_class)
+        copernicus_forest = _isin(copernicus_landcover_array,
+                                  forest_mask_landcover_classes)
+    else:
+        copernicus_forest = np.zeros_like(tree_aggregate_sum, dtype=np.bool_)
 
-    tree_aggregate_sum = np.where(copernicus_forest, tree_aggregate_sum, 0)
+    # zero out the tree aggregate sum outside forest areas (in place)
+    tree_aggregate_sum *= copernicus_forest
     del copernicus_forest
 
-    logger.info(f'    combining masks')
-    # create array filled with "fill value"
-    landcover_fill_value = \
-        dswx_hls_landcover_classes_dict['fill_value']
-    hierarchy_combined = np.full(water_aggregate_sum.shape,
-        landcover_fill_value, dtype=np.uint8)
-
-    # load threshold list according to `mask_type`
-    threshold_list = landcover_threshold_dict[mask_type.lower()]
-
-    # aggregate sum value of 7/9 or higher is called tree
-    evergreen_forest_class = \
-        dswx_hls_landcover_classes_dict['evergreen_forest']
-    _update_landcover_array(hierarchy_combined, tree_aggregate_sum,
-                            threshold_list[0], evergreen_forest_class)
-
     # extract the year of the WorldCover dataset
     worldcover_gdal_ds = gdal.Open(worldcover_file, gdal.GA_ReadOnly)
     worldcover_metadata = worldcover_gdal_ds.GetMetadata()
@@ -1052,11 +1200,14 @@ def create_landcover_mask(copernicus_landcover_file,
 
     if ('time_start' in worldcover_metadata.keys() and
             'time_end' in worldcover_metadata.keys()):
-        worldcover_datetime_format = '%Y-%m-%dT%H:%M:%SZ'
-        worldcover_time_start = datetime.strptime(worldcover_metadata['time_start'],
-                                                  worldcover_datetime_format)
-        worldcover_time_end = datetime.strptime(worldcover_metadata['time_end'],
-                                                worldcover_datetime_format)
+        # time fields are in the format "%Y-%m-%dT%H:%M:%SZ". Parse them
+        # with `fromisoformat()`, which is much faster than `strptime()`
+        # (the trailing "Z" is removed since it is only accepted by
+        # `fromisoformat()` from Python 3.11)
+        worldcover_time_start = datetime.fromisoformat(
+            worldcover_metadata['time_start'].rstrip('Z'))
+        worldcover_time_end = datetime.fromisoformat(
+            worldcover_metadata['time_end'].rstrip('Z'))
 
         # the Worldcover dataset year is extracted from the average date times
         worldcover_time_range = (worldcover_time_end - worldcover_time_start)
@@ -1087,25 +1238,47 @@ def create_landcover_mask(copernicus_landcover_file,
 
     year_offset = year - 2000
 
+    logger.info(f'    combining masks')
+    landcover_fill_value = \
+        dswx_hls_landcover_classes_dict['fill_value']
+
+    # load threshold list according to `mask_type`
+    threshold_list = landcover_threshold_dict[mask_type.lower()]
+
+    # aggregate sum value of 7/9 or higher is called tree
+    evergreen_forest_class = \
+        dswx_hls_landcover_classes_dict['evergreen_forest']
+
     # majority of pixels are urban
     low_intensity_developed_class = \
         (dswx_hls_landcover_classes_dict['low_intensity_developed_offset'] +
          year_offset)
-    _update_landcover_array(hierarchy_combined, urban_aggregate_sum,
-                            threshold_list[1], low_intensity_developed_class)
 
     # high density urban at 7/9 or higher
     high_intensity_developed_class = \
         (dswx_hls_landcover_classes_dict['high_intensity_developed_offset'] +
          year_offset)
-    _update_landcover_array(hierarchy_combined, urban_aggregate_sum,
-                            threshold_list[2], high_intensity_developed_class)
 
     # water where 1/3 or more pixels
     water_class = \
         dswx_hls_landcover_classes_dict['water']
-    _update_landcover_array(hierarchy_combined, water_aggregate_sum,
-                            threshold_list[3], water_class)
+
+    # combine the masks in a single pass. Conditions are listed from the
+    # highest to the lowest priority (water, high-intensity developed,
+    # low-intensity developed, and evergreen forest); pixels that do not
+    # satisfy any condition are set to the "fill value"
+    hierarchy_combined = np.select(
+        [water_aggregate_sum >= threshold_list[3],
+         urban_aggregate_sum >= threshold_list[2],
+         urban_aggregate_sum >= threshold_list[1],
+         tree_aggregate_sum >= threshold_list[0]],
+        [np.uint8(water_class),
+         np.uint8(high_intensity_developed_class),
+         np.uint8(low_intensity_developed_class),
+         np.uint8(evergreen_forest_class)],
+        default=np.uint8(landcover_fill_value))
+    del aggregate_sums, water_aggregate_sum, urban_aggregate_sum, \
+        tree_aggregate_sum
 
     ctable = _get_landcover_mask_ctable()
 
@@ -1200,8 +1373,8 @@ def _is_landcover_class_high_intensity_developed(landcover_mask):
     return high_intensity_developed_mask
 
 
-def _apply_aerosol_class_remapping_single_class(wtr_1_layer, nir,
-        preliminary_cloud_layer, fmask,
+def _apply_aerosol_class_remapping_single_class(wtr_1_layer,
+        low_nir_mask, preliminary_cloud_layer, fmask,
         fmask_values, input_wtr1_class, output_wtr1_class):
     """Apply aerosol remapping onto interpreted layer (WTR-1) given a
        WTR-1 class and fmask values. The function also sets
@@ -1211,8 +1384,9 @@ def _apply_aerosol_class_remapping_single_class(wtr_1_layer, nir,
        ----------
        wtr_1_layer: numpy.ndarray
             Interpreted layer (WTR-1) (mutable numpy.ndarray)
-       nir: numpy.ndarray
-            Near infrared (NIR) channel
+       low_nir_mask: numpy.ndarray
+            Boolean mask of pixels with near infrared (NIR) reflectance
+            up to `AEROSOL_REMAPPING_MAX_NIR`
        preliminary_cloud_layer : numpy.ndarray
             Preliminary cloud mask aerosol remapping bit (mutable
             numpy.ndarray)
@@ -1227,9 +1401,9 @@ def _apply_aerosol_class_remapping_single_class(wtr_1_layer, nir,
             Remapped WTR-1 class
     """
 
-    to_remap_array = ((np.isin(fmask, fmask_values)) &
+    to_remap_array = ((_isin(fmask, fmask_values)) &
                       (wtr_1_layer == input_wtr1_class) &
-                      (nir <= AEROSOL_REMAPPING_MAX_NIR))
+                      low_nir_mask)
     wtr_1_layer[to_remap_array] = output_wtr1_class
 
     # set CLOUD layer bit (3): 2**3 = 8
@@ -1288,10 +1462,19 @@ def _apply_aerosol_class_remapping(wtr_1_layer, nir,
              WATER_UNCOLLAPSED_HIGH_CONF_CLEAR)
         }
 
+    # The NIR test is the same for all classes, so it is computed once.
+    # The threshold is cast to the NIR data type (rounded down for integer
+    # types) so that the comparison does not upcast the NIR array
+    if np.issubdtype(nir.dtype, np.integer):
+        max_nir = nir.dtype.type(np.floor(AEROSOL_REMAPPING_MAX_NIR))
+    else:
+        max_nir = nir.dtype.type(AEROSOL_REMAPPING_MAX_NIR)
+    low_nir_mask = nir <= max_nir
+
     for input_wtr1_class, (fmask_values, output_wtr1_class) in \
             wtr1_class_fmask_values_dict.items():
         _apply_aerosol_class_remapping_single_class(wtr_1_layer,
-            nir, preliminary_cloud_layer, fmask,
+            low_nir_mask, preliminary_cloud_layer, fmask,
             fmask_values, input_wtr1_class, output_wtr1_class)
 
 
@@ -1783,8 +1966,8 @@ def _get_confidence_layer(wtr_2_layer, cloud_layer):
     conf_layer = wtr_2_layer.copy()
 
     # Update the pixels with cloud and/or cloud shadow
-    cloud_idx = np.isin(cloud_layer, [1, 3, 4, 5, 6, 7,
-                                      9, 11, 12, 13, 14, 15])
+    cloud_idx = _isin(cloud_layer, [1, 3, 4, 5, 6, 7,
+                                    9, 11, 12, 13, 14, 15])
 
     idx = ((conf_layer == WATER_NOT_WATER_CLEAR) & cloud_idx)
     conf_layer[idx] = WATER_NOT_WATER_CLOUD
@@ -1831,7 +2014,8 @@ def _get_confidence_layer(wtr_2_layer, cloud_layer):
 
 
 def _compute_diagnostic_tests(blue, green, red, nir, swir1, swir2,
-                              hls_thresholds):
+                              hls_thresholds,
+                              block_nlines = DIAGNOSTIC_TESTS_BLOCK_NLINES):
     """Compute diagnost tests over reflectance channels: Blue,
     Green, Red, NIR, SWIR-1, and SWIR-2, and return
     diagnostic test band
@@ -1852,6 +2036,8 @@ def _compute_diagnostic_tests(blue, green, red, nir, swir1, swir2,
               Short-wave infrared 2 (SWIR-2) channel
        hls_thresholds: HlsThresholds
               HLS reflectance thresholds for generating DSWx-HLS products
+       block_nlines: int (optional)
+              Number of lines processed at a time
 
        Returns
        -------
@@ -1861,6 +2047,53 @@ def _compute_diagnostic_tests(blue, green, red, nir, swir1, swir2,
 
     logger.info('computing diagnostic tests (generating DIAG layer)')
 
+    # Diagnostic test band. The five test bits plus the no-data bit
+    # (DIAGNOSTIC_LAYER_NO_DATA_DECIMAL) fit in a single byte
+    shape = blue.shape
+    diagnostic_layer = np.zeros(shape, dtype = np.uint8)
+
+    # The tests are pixel-wise, so they are computed over blocks of lines
+    # to bound the size of the intermediate (floating-point) arrays
+    for line_start in range(0, shape[0], block_nlines):
+        block_slice = slice(line_start, line_start + block_nlines)
+        _compute_diagnostic_tests_block(blue[block_slice],
+                                        green[block_slice],
+                                        red[block_slice],
+                                        nir[block_slice],
+                                        swir1[block_slice],
+                                        swir2[block_slice],
+                                        hls_thresholds,
+                                        diagnostic_layer[block_slice])
+
+    return diagnostic_layer
+
+
+def _compute_diagnostic_tests_block(blue, green, red, nir, swir1, swir2,
+                                    hls_thresholds, diagnostic_layer):
+    """Compute diagnost tests over a block of the reflectance channels
+    and add the test results to the corresponding block of the diagnostic
+    test band
+
+       Parameters
+       ----------
+       blue: numpy.ndarray
+              Blue channel block
+       green: numpy.ndarray
+              Green channel block
+       red: numpy.ndarray
+              Red channel block
+       nir: numpy.ndarray
+              Near infrared (NIR) channel block
+       swir1: numpy.ndarray
+              Short-wave infrared 1 (SWIR-1) channel block
+       swir2: numpy.ndarray
+              Short-wave infrared 2 (SWIR-2) channel block
+       hls_thresholds: HlsThresholds
+              HLS reflectance thresholds for generating DSWx-HLS products
+       diagnostic_layer: numpy.ndarray
+              Diagnostic test band block (updated in place)
+    """
+
     # Modified Normalized Difference Wetness Index (MNDWI)
     mndwi = (green - swir1)/(green + swir1)
 
@@ -1876,10 +2109,6 @@ def _compute_diagnostic_tests(blue, green, red, nir, swir1, swir2,
     # Normalized Difference Vegetation Index (NDVI)
     ndvi = (nir - red) / (nir + red)
 
-    # Diagnostic test band
-    shape = blue.shape
-    diagnostic_layer = np.zeros(shape, dtype = np.uint16)
-
     # Surface water tests (see [1, 2])
 
     # Test 1 (open water test, more conservative)
@@ -1905,8 +2134,6 @@ def _compute_diagnostic_tests(blue, green, red, nir, swir1, swir2,
                    (swir2 < hls_thresholds.pswt_2_swir2) &
                    (nir < hls_thresholds.pswt_2_nir))
     diagnostic_layer[ind] += 16
- 
-    return diagnostic_layer
 
 
 def _compute_preliminary_cloud_layer(fmask, mask_adjacent_to_cloud_mode):
@@ -1945,7 +2172,7 @@ def _compute_preliminary_cloud_layer(fmask, mask_adjacent_to_cloud_mode):
        _apply_aerosol_class_remapping: Add bit indicating class
             reassignment due to aerosol interpolation errors
     """
-    preliminary_cloud_layer = np.zeros(fmask.shape, dtype = np.uint8)
+    preliminary_cloud_layer = np.empty(fmask.shape, dtype = np.uint8)
 
     '''
     Input HLS Fmask bit encoding:
@@ -1974,18 +2201,45 @@ def _compute_preliminary_cloud_layer(fmask, mask_adjacent_to_cloud_mode):
         raise Exception(error_msg)
 
     # Check Fmask cloud shadow bit (3) => bit 0
-    preliminary_cloud_layer[np.bitwise_and(fmask, 2**3) == 2**3] = 1
+    _get_fmask_bit(fmask, 3, out=preliminary_cloud_layer)
 
+    fmask_bit = np.empty_like(preliminary_cloud_layer)
     if mask_adjacent_to_cloud_mode == 'mask':
         # Check Fmask adjacent to cloud/shadow bit (2) => bit 0
-       preliminary_cloud_layer[np.bitwise_and(fmask, 2**2) == 2**2] = 1
+        preliminary_cloud_layer |= _get_fmask_bit(fmask, 2, out=fmask_bit)
 
     # Check Fmask cloud bit (1) => bit 2
-    preliminary_cloud_layer[np.bitwise_and(fmask, 2**1) == 2**1] += 4
+    _get_fmask_bit(fmask, 1, out=fmask_bit)
+    fmask_bit <<= 2
+    preliminary_cloud_layer |= fmask_bit
 
     return preliminary_cloud_layer
 
 
+def _get_fmask_bit(fmask, bit, out=None):
+    """Extract a bit from the Fmask. The bit is shifted and masked
+       in place, without intermediate arrays
+
+       Parameters
+       ----------
+       fmask: numpy ndarray
+            HLS Fmask
+       bit: int
+            Bit position
+       out: numpy ndarray (optional)
+            Output array. If not provided, an array with the same
+            data type as `fmask` is allocated
+
+       Returns
+       -------
+       fmask_bit : numpy.ndarray
+            Fmask bit (0 or 1)
+    """
+    out = np.right_shift(fmask, bit, out=out, casting='unsafe')
+    np.bitwise_and(out, 1, out=out)
+    return out
+
+
 def _add_snow_to_cloud_layer(wtr_2_layer, cloud_layer, fmask,
                              mask_adjacent_to_cloud_mode):
     """Finish computing the CLOUD layer by adding the snow/ice class
@@ -2041,13 +2295,16 @@ def _add_snow_to_cloud_layer(wtr_2_layer, cloud_layer, fmask,
     (*) Updates the output CLOUD layer in this function
     '''
 
-    # Check Fmask snow bit (4) => bit 1
-    snow_mask = np.bitwise_and(fmask, 2**4) == 2**4
+    # Check Fmask snow bit (4) => bit 1. The 0/1 bit array is viewed
+    # as boolean (no copy)
+    snow_mask = _get_fmask_bit(
+        fmask, 4, out=np.empty(fmask.shape, dtype=np.uint8)).view(np.bool_)
 
     # Cover areas marked as adjacent to cloud/shadow
     if mask_adjacent_to_cloud_mode == 'cover':
         # Dilate snow mask over areas adjacent to cloud/shadow
-        adjacent_to_cloud_layer = np.bitwise_and(fmask, 2**2) == 2**2
+        adjacent_to_cloud_layer = _get_fmask_bit(
+            fmask, 2, out=np.empty(fmask.shape, dtype=np.uint8)).view(np.bool_)
         areas_to_dilate = (adjacent_to_cloud_layer) & (cloud_layer == 0)
 
         snow_mask = binary_dilation(snow_mask, iterations=10,
@@ -2126,10 +2383,41 @@ def _apply_cloud_masking(wtr_2_layer, cloud_layer):
     return wtr_layer
 
 
+def _read_hls_band(filename, flag_debug = False):
+    """Open HLS band file and read the band image
+
+       Parameters
+       ----------
+       filename: str
+              Filename containing HLS band
+       flag_debug: bool (optional)
+              Flag to indicate if execution is for debug purposes. If so,
+              only a subset of the image will be read
+
+       Returns
+       -------
+       layer_gdal_dataset : gdal.Dataset
+              GDAL dataset (None if the file could not be opened)
+       image : numpy.ndarray
+              HLS band image (None if the file could not be opened)
+    """
+    layer_gdal_dataset = gdal.Open(filename, gdal.GA_ReadOnly)
+    if layer_gdal_dataset is None:
+        return None, None
+
+    if flag_debug:
+        image = layer_gdal_dataset.ReadAsArray(
+            xoff=0, yoff=0, xsize=1000, ysize=1000)
+    else:
+        image = layer_gdal_dataset.ReadAsArray()
+
+    return layer_gdal_dataset, image
+
+
 def _load_hls_band_from_file(filename, image_dict, offset_dict, scale_dict,
                              dswx_metadata_dict, band_name,
                              flag_offset_and_scale_inputs, flag_debug = False,
-                             band_suffix = None):
+                             band_suffix = None, hls_band = None):
     """Load HLS band from file into memory
 
        Parameters
@@ -2156,13 +2444,21 @@ def _load_hls_band_from_file(filename, image_dict, offset_dict, scale_dict,
        band_suffix: str (optional)
               Indicate band suffix that should be removed from file
               name to extract band name
+       hls_band: tuple (optional)
+              GDAL dataset and band image previously read from `filename`
+              with `_read_hls_band()`. If not provided, the band is read
+              from `filename`
 
        Returns
        -------
        flag_success : bool
               Flag indicating if band was successfuly loaded into memory
     """
-    layer_gdal_dataset = gdal.Open(filename, gdal.GA_ReadOnly)
+    if flag_debug:
+        logger.info('reading in debug mode')
+    if hls_band is None:
+        hls_band = _read_hls_band(filename, flag_debug = flag_debug)
+    layer_gdal_dataset, image = hls_band
     if layer_gdal_dataset is None:
         return None
     band = layer_gdal_dataset.GetRasterBand(1)
@@ -2176,15 +2472,6 @@ def _load_hls_band_from_file(filename, image_dict, offset_dict, scale_dict,
 
     metadata = layer_gdal_dataset.GetMetadata()
 
-    # read image
-    if flag_debug:
-        logger.info('reading in debug mode')
-        image = layer_gdal_dataset.ReadAsArray(
-            xoff=0, yoff=0, xsize=1000, ysize=1000)
-    else:
-        image = layer_gdal_dataset.ReadAsArray()
-
-
     # read `fill_value`
     if fill_value is None and '_FillValue' in metadata.keys():
         fill_value = float(metadata['_FillValue'])
@@ -2223,15 +2510,15 @@ def _load_hls_band_from_file(filename, image_dict, offset_dict, scale_dict,
 
     if 'SPACECRAFT_NAME' not in dswx_metadata_dict.keys():
         for k, v in metadata.items():
-            if k.upper() in METADATA_FIELDS_TO_COPY_FROM_HLS_LIST:
-                dswx_metadata_dict[k.upper()] = v
-            elif k.upper() in ['SPATIAL_COVERAGE', 'CLOUD_COVERAGE']:
-                dswx_metadata_key = 'INPUT_HLS_PRODUCT_'+k.upper()
+            k_upper = k.upper()
+            if k_upper in METADATA_FIELDS_TO_COPY_FROM_HLS_LIST:
+                dswx_metadata_dict[k_upper] = v
+            elif k_upper in {'SPATIAL_COVERAGE', 'CLOUD_COVERAGE'}:
+                dswx_metadata_key = 'INPUT_HLS_PRODUCT_'+k_upper
                 dswx_metadata_dict[dswx_metadata_key] = v
-            elif (k.upper() == 'LANDSAT_PRODUCT_ID' or
-                    k.upper() == 'PRODUCT_URI'):
+            elif k_upper in {'LANDSAT_PRODUCT_ID', 'PRODUCT_URI'}:
                 dswx_metadata_dict['SENSOR_PRODUCT_ID'] = v
-            elif k.upper() == 'SENSING_TIME':
+            elif k_upper == 'SENSING_TIME':
                 dswx_metadata_dict['SENSING_TIME'] = v
 
         sensor = None
@@ -2288,11 +2575,15 @@ def _load_hls_band_from_file(filename, image_dict, offset_dict, scale_dict,
     if 'scale_factor' in metadata:
         scale_factor = float(metadata['scale_factor'])
 
+    # `image` is owned by this function (freshly read from the file), so it
+    # can be updated in place without allocating temporary arrays
     if FLAG_CLIP_NEGATIVE_REFLECTANCE:
-        image = np.clip(image, 1, None)
+        np.clip(image, 1, None, out=image)
     if flag_offset_and_scale_inputs:
-        image = scale_factor * (np.asarray(image, dtype=np.float32) -
-                                offset)
+        image = image.astype(np.float32)
+        if offset != 0:
+            image -= np.float32(offset)
+        image *= np.float32(scale_factor)
 
     image_dict[band_name] = image
 
@@ -2389,31 +2680,68 @@ def _load_hls_product_v2(file_list, image_dict, offset_dict,
               Flag indicating if band was successfuly loaded into memory
     """
     logger.info('loading HLS v.2.0 layers:')
-    for key in l30_v2_band_dict.keys():
 
-        logger.info(f'    {key}')
+    # Bands other than the first one are read concurrently (GDAL releases
+    # the GIL while reading and decoding the files) and loaded in order.
+    # The pool is kept small because, when GDAL_NUM_THREADS is set (e.g.,
+    # to ALL_CPUS by `set_gdal_config_options()`), each band read already
+    # decodes its blocks using multiple threads. Two workers are enough to
+    # read the next band while the current one is being loaded
+    hls_band_futures_list = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        for key in l30_v2_band_dict.keys():
+
+            # Sensor is undertermined (first band) or LANDSAT
+            if ('SPACECRAFT_NAME' not in dswx_metadata_dict.keys() or
+                    'LANDSAT' in dswx_metadata_dict['SPACECRAFT_NAME'].upper()):
+                band_name = l30_v2_band_dict[key]
+            else:
+                band_name = s30_v2_band_dict[key]
 
-        # Sensor is undertermined (first band) or LANDSAT
-        if ('SPACECRAFT_NAME' not in dswx_metadata_dict.keys() or
-                'LANDSAT' in dswx_metadata_dict['SPACECRAFT_NAME'].upper()):
-            band_name = l30_v2_band_dict[key]
-        else:
-            band_name = s30_v2_band_dict[key]
+            for filename in file_list:
+                if band_name + '.tif' in filename:
+                    break
+            else:
+                logger.info(f'    {key}')
+                logger.info(f'ERROR band {key} not found within list of input'
+                            ' file(s)')
+                return
+
+            if 'SPACECRAFT_NAME' in dswx_metadata_dict.keys():
+                hls_band_future = executor.submit(_read_hls_band, filename,
+                                                  flag_debug = flag_debug)
+                hls_band_futures_list.append(
+                    (key, band_name, filename, hls_band_future))
+                continue
 
-        for filename in file_list:
-            if band_name + '.tif' in filename:
-                break
-        else:
-            logger.info(f'ERROR band {key} not found within list of input'
-                        ' file(s)')
-            return
-        success = _load_hls_band_from_file(filename, image_dict, offset_dict,
-                                           scale_dict, dswx_metadata_dict,
-                                           key, flag_offset_and_scale_inputs,
-                                           flag_debug = flag_debug,
-                                           band_suffix = band_name)
-        if not success:
-            return False
+            # The first band is loaded before the remaining band files are
+            # searched since it determines the sensor and, therefore, the
+            # band names of the remaining bands
+            logger.info(f'    {key}')
+            success = _load_hls_band_from_file(filename, image_dict,
+                                               offset_dict, scale_dict,
+                                               dswx_metadata_dict, key,
+                                               flag_offset_and_scale_inputs,
+                                               flag_debug = flag_debug,
+                                               band_suffix = band_name)
+            if not success:
+                return False
+
+        # futures are removed from the list as they are consumed so that
+        # the raw band images and GDAL datasets are released once loaded
+        while hls_band_futures_list:
+            key, band_name, filename, hls_band_future = \
+                hls_band_futures_list.pop(0)
+            logger.info(f'    {key}')
+            success = _load_hls_band_from_file(filename, image_dict,
+                                               offset_dict, scale_dict,
+                                               dswx_metadata_dict, key,
+                                               flag_offset_and_scale_inputs,
+                                               flag_debug = flag_debug,
+                                               band_suffix = band_name,
+                                               hls_band = hls_band_future.result())
+            if not success:
+                return False
 
     return True
 
@@ -2631,21 +2959,18 @@ def save_dswx_product(layer_image, layer_name,
 
     dswx_processed_bands[layer_name.replace('-', '_').lower()] = layer_image
 
-    # translate dswx_processed_bands_keys to band_description_dict keys
+    # translate dswx_processed_bands keys to band_description_dict keys
     # example: wtr_1 to WTR-1
-    dswx_processed_bands_keys = list(dswx_processed_bands.keys())
-    dswx_processed_band_names_list = []
-    for dswx_processed_bands_key in dswx_processed_bands_keys:
-        dswx_processed_band_names_list.append(
-            dswx_processed_bands_key.upper().replace('_', '-'))
+    dswx_processed_band_names_set = set()
 
     # check input arrays different than None
     n_valid_bands = 0
-    band_description_dict_keys = list(band_description_dict.keys())
-    for i, band_name in enumerate(dswx_processed_band_names_list):
-        if band_name not in band_description_dict_keys:
+    for dswx_processed_bands_key, band_array in dswx_processed_bands.items():
+        band_name = dswx_processed_bands_key.upper().replace('_', '-')
+        dswx_processed_band_names_set.add(band_name)
+        if band_name not in band_description_dict:
             continue
-        if dswx_processed_bands[dswx_processed_bands_keys[i]] is None:
+        if band_array is None:
             continue
         n_valid_bands += 1
 
@@ -2654,9 +2979,10 @@ def save_dswx_product(layer_image, layer_name,
         nbands = 1
     else:
         # save DSWx product
-        nbands = len(band_description_dict.keys())
+        nbands = len(band_description_dict)
 
-    gdal_ds = driver.Create(output_file, shape[1], shape[0], nbands, gdal.GDT_Byte)
+    gdal_ds = driver.Create(output_file, shape[1], shape[0], nbands, gdal.GDT_Byte,
+                            options=GEOTIFF_CREATION_OPTIONS_LIST)
     gdal_ds.SetMetadata(dswx_metadata_dict)
     gdal_ds.SetGeoTransform(geotransform)
     gdal_ds.SetProjection(projection)
@@ -2666,7 +2992,7 @@ def save_dswx_product(layer_image, layer_name,
     for layer_name, description_from_dict in band_description_dict.items():
 
         # check if band is in the list of processed bands
-        if layer_name not in dswx_processed_band_names_list:
+        if layer_name not in dswx_processed_band_names_set:
             continue
 
         # index using processed key from band name (e.g., WTR-1 to wtr_1)
@@ -2802,7 +3128,8 @@ def save_cloud_layer(mask, output_file, dswx_metadata_dict, geotransform, projec
     _makedirs(output_file)
     shape = mask.shape
     driver = gdal.GetDriverByName("GTiff")
-    gdal_ds = driver.Create(output_file, shape[1], shape[0], 1, gdal.GDT_Byte)
+    gdal_ds = driver.Create(output_file, shape[1], shape[0], 1, gdal.GDT_Byte,
+                            options=GEOTIFF_CREATION_OPTIONS_LIST)
     gdal_ds.SetMetadata(dswx_metadata_dict)
     gdal_ds.SetGeoTransform(geotransform)
     gdal_ds.SetProjection(projection)
@@ -2856,7 +3183,8 @@ def _save_binary_water(binary_water_layer, output_file, dswx_metadata_dict,
     _makedirs(output_file)
     shape = binary_water_layer.shape
     driver = gdal.GetDriverByName("GTiff")
-    gdal_ds = driver.Create(output_file, shape[1], shape[0], 1, gdal.GDT_Byte)
+    gdal_ds = driver.Create(output_file, shape[1], shape[0], 1, gdal.GDT_Byte,
+                            options=GEOTIFF_CREATION_OPTIONS_LIST)
     gdal_ds.SetMetadata(dswx_metadata_dict)
     gdal_ds.SetGeoTransform(geotransform)
     gdal_ds.SetProjection(projection)
@@ -2917,7 +3245,8 @@ def _save_array(input_array, output_file, dswx_metadata_dict, geotransform,
     _makedirs(output_file)
     shape = input_array.shape
     driver = gdal.GetDriverByName("GTiff")
-    gdal_ds = driver.Create(output_file, shape[1], shape[0], 1, output_dtype)
+    gdal_ds = driver.Create(output_file, shape[1], shape[0], 1, output_dtype,
+                            options=GEOTIFF_CREATION_OPTIONS_LIST)
     if dswx_metadata_dict is not None:
         gdal_ds.SetMetadata(dswx_metadata_dict)
     gdal_ds.SetGeoTransform(geotransform)
@@ -2946,7 +3275,7 @@ def _save_array(input_array, output_file, dswx_metadata_dict, geotransform,
 
 def _makedirs(input_file):
     output_dir = os.path.dirname(input_file)
-    if not output_dir:
+    if not output_dir or output_dir.startswith('/vsimem'):
         return
     os.makedirs(output_dir, exist_ok=True)
 
@@ -2997,7 +3326,8 @@ def _save_output_rgb_file(red, green, blue, output_file,
     shape = blue.shape
     driver = gdal.GetDriverByName("GTiff")
     gdal_dtype = GDT_Float32
-    gdal_ds = driver.Create(output_file, shape[1], shape[0], 3, gdal_dtype)
+    gdal_ds = driver.Create(output_file, shape[1], shape[0], 3, gdal_dtype,
+                            options=GEOTIFF_CREATION_OPTIONS_LIST)
     gdal_ds.SetMetadata(dswx_metadata_dict)
     gdal_ds.SetGeoTransform(geotransform)
     gdal_ds.SetProjection(projection)
@@ -3188,7 +3518,7 @@ def _warp(input_file, geotransform, projection,
           scratch_dir = '.',
           resample_algorithm='nearest',
           relocated_file=None, margin_in_pixels=0,
-          temp_files_list = None):
+          temp_files_list = None, num_threads = None):
     """Relocate/reproject a file (e.g., landcover or DEM) based on geolocation
        defined by a geotransform, output dimensions (length and width)
        and projection
@@ -3219,12 +3549,20 @@ def _warp(input_file, geotransform, projection,
               Mutable list of temporary files. If provided,
               paths to the temporary files generated will be
               appended to this list.
+       num_threads: int (optional)
+              Number of threads used by gdal.Warp(). If not provided,
+              the number of threads is defined by the GDAL
+              configuration option GDAL_NUM_THREADS
 
        Returns
        -------
        relocated_array : numpy.ndarray
               Relocated array
     """
+    if num_threads is None:
+        warp_options = []
+    else:
+        warp_options = [f'NUM_THREADS={num_threads}']
 
     # Pixel spacing
     dy = geotransform[5]
@@ -3255,7 +3593,8 @@ def _warp(input_file, geotransform, projection,
 
     _makedirs(relocated_file)
 
-    # Test for antimeridian ("dateline") crossing
+    # Test for antimeridian ("dateline") crossing. The same dataset handle
+    # is reused below as input of gdal.Warp() and gdal.Translate()
     gdal_ds = gdal.Open(input_file, gdal.GA_ReadOnly)
     file_projection = gdal_ds.GetProjection()
 
@@ -3266,7 +3605,6 @@ def _warp(input_file, geotransform, projection,
     file_length = gdal_ds.GetRasterBand(1).YSize
     no_data = gdal_ds.GetRasterBand(1).GetNoDataValue()
 
-    del gdal_ds
     file_srs = osr.SpatialReference()
     file_srs.ImportFromProj4(file_projection)
 
@@ -3290,19 +3628,23 @@ def _warp(input_file, geotransform, projection,
         logger.info(f'    relocating file: {input_file} to'
                     f' file: {relocated_file}')
 
-        gdal.Warp(relocated_file, input_file,
-                  format='GTiff',
-                  dstSRS=tile_srs_str,
-                  outputBounds=[tile_min_x_utm, tile_min_y_utm,
-                                tile_max_x_utm, tile_max_y_utm],
-                  multithread=True,
-                  xRes=dx, yRes=abs(dy), resampleAlg=resample_algorithm,
-                  errorThreshold=0)
-
-        gdal_ds = gdal.Open(relocated_file, gdal.GA_ReadOnly)
-        relocated_array = gdal_ds.ReadAsArray()
+        relocated_gdal_ds = gdal.Warp(
+            relocated_file, gdal_ds,
+            format='GTiff',
+            dstSRS=tile_srs_str,
+            outputBounds=[tile_min_x_utm, tile_min_y_utm,
+                          tile_max_x_utm, tile_max_y_utm],
+            multithread=True,
+            warpOptions=warp_options,
+            xRes=dx, yRes=abs(dy), resampleAlg=resample_algorithm,
+            errorThreshold=0)
         del gdal_ds
 
+        # read the relocated array from the dataset returned by gdal.Warp()
+        # rather than reopening `relocated_file`
+        relocated_array = relocated_gdal_ds.ReadAsArray()
+        del relocated_gdal_ds
+
         return relocated_array
 
     logger.info(f'    tile crosses the antimeridian')
@@ -3318,14 +3660,17 @@ def _warp(input_file, geotransform, projection,
                                   file_max_x,
                                   tile_min_y]
 
+    # The two crops are saved as VRTs that reference the input file so that
+    # the input pixels are only decoded once, by gdal.Warp() below
     cropped_input_antimeridian_left_temp = tempfile.NamedTemporaryFile(
-                dir=scratch_dir, suffix='.tif').name
+                dir=scratch_dir, suffix='.vrt').name
     logger.info(f'    cropping antimeridian-left side: {input_file} to'
                 f' temporary file: {cropped_input_antimeridian_left_temp}'
                 ' with indexes (ulx uly lrx lry):'
                 f' {proj_win_antimeridian_left}')
 
-    gdal.Translate(cropped_input_antimeridian_left_temp, input_file,
+    gdal.Translate(cropped_input_antimeridian_left_temp, gdal_ds,
+                   format='VRT',
                    projWin=proj_win_antimeridian_left,
                    outputSRS=file_srs,
                    noData=no_data)
@@ -3337,18 +3682,21 @@ def _warp(input_file, geotransform, projection,
                                    tile_max_x - 360,
                                    tile_min_y]
     cropped_input_antimeridian_right_temp = tempfile.NamedTemporaryFile(
-                dir=scratch_dir, suffix='.tif').name
+                dir=scratch_dir, suffix='.vrt').name
 
     logger.info(f'    cropping antimeridian-right side: {input_file} to'
                 f' temporary file: {cropped_input_antimeridian_right_temp}'
                 ' with indexes (ulx uly lrx lry):'
                 f' {proj_win_antimeridian_right}')
 
-    gdal.Translate(cropped_input_antimeridian_right_temp, input_file,
+    gdal.Translate(cropped_input_antimeridian_right_temp, gdal_ds,
+                   format='VRT',
                    projWin=proj_win_antimeridian_right,
                    outputSRS=file_srs,
                    noData=no_data)
 
+    del gdal_ds
+
     if temp_files_list is not None:
         temp_files_list.append(cropped_input_antimeridian_left_temp)
         temp_files_list.append(cropped_input_antimeridian_right_temp)
@@ -3359,18 +3707,19 @@ def _warp(input_file, geotransform, projection,
     logger.info(f'    relocating file: {input_file} to'
                 f' file: {relocated_file}')
 
-    gdal.Warp(relocated_file, gdalwarp_input_file_list,
-              format='GTiff',
-              dstSRS=tile_srs_str,
-              outputBounds=[tile_min_x_utm, tile_min_y_utm,
-                            tile_max_x_utm, tile_max_y_utm],
-              multithread=True,
-              xRes=dx, yRes=abs(dy), resampleAlg=resample_algorithm,
-              errorThreshold=0)
-
-    gdal_ds = gdal.Open(relocated_file, gdal.GA_ReadOnly)
-    relocated_array = gdal_ds.ReadAsArray()
-    del gdal_ds
+    relocated_gdal_ds = gdal.Warp(
+        relocated_file, gdalwarp_input_file_list,
+        format='GTiff',
+        dstSRS=tile_srs_str,
+        outputBounds=[tile_min_x_utm, tile_min_y_utm,
+                      tile_max_x_utm, tile_max_y_utm],
+        multithread=True,
+        warpOptions=warp_options,
+        xRes=dx, yRes=abs(dy), resampleAlg=resample_algorithm,
+        errorThreshold=0)
+
+    relocated_array = relocated_gdal_ds.ReadAsArray()
+    del relocated_gdal_ds
 
     return relocated_array
 
@@ -3454,9 +3803,8 @@ def _get_tile_srs_bbox(tile_min_y_utm, tile_max_y_utm,
     return tile_polygon, tile_min_y, tile_max_y, tile_min_x, tile_max_x
 
 
-def _create_ocean_mask(shapefile, margin_km, scratch_dir,
-                       geotransform, projection, length, width,
-                       temp_files_list = None):
+def _create_ocean_mask(shapefile, margin_km,
+                       geotransform, projection, length, width):
     """Compute ocean mask from NOAA GSHHS shapefile. 
 
        Parameters
@@ -3466,8 +3814,6 @@ def _create_ocean_mask(shapefile, margin_km, scratch_dir,
        margin_km: int
               Margin (buffer) towards the ocean to be added to the shore lines
               in km
-       scratch_dir: str
-              Directory for temporary files
        geotransform: numpy.ndarray
               Geotransform describing the DSWx-HLS product geolocation
        projection: str
@@ -3476,10 +3822,6 @@ def _create_ocean_mask(shapefile, margin_km, scratch_dir,
               DSWx-HLS product's length (number of lines)
        width: int
               DSWx-HLS product's width (number of columns)
-       temp_files_list: list (optional)
-              Mutable list of temporary files. If provided,
-              paths to the temporary files generated will be
-              appended to this list.
 
        Returns
        -------
@@ -3499,17 +3841,23 @@ def _create_ocean_mask(shapefile, margin_km, scratch_dir,
     # convert margin from km to meters
     margin_m = int(1000 * margin_km)
 
-    tile_polygon = None
-    ocean_mask = np.zeros((length, width), dtype=np.uint8)
+    tile_polygon_with_margin = None
     shapefile_ds = ogr.Open(shapefile, 0)
 
+    # intersecting polygons are collected in a single in-memory vector layer
+    # and rasterized at once
+    memory_driver = ogr.GetDriverByName('Memory')
+    out_ds = memory_driver.CreateDataSource('')
+    out_layer = out_ds.CreateLayer("polygon", tile_srs, ogr.wkbPolygon)
+    out_layer_defn = out_layer.GetLayerDefn()
+
     for layer in shapefile_ds:
         for feature in layer:
             geom = feature.GetGeometryRef()
             if geom.GetGeometryName() != 'POLYGON':
                 continue
 
-            if tile_polygon is None:
+            if tile_polygon_with_margin is None:
                 polygon_srs = geom.GetSpatialReference()
                 tile_polygon_with_margin, *_ = \
                     _get_tile_srs_bbox(tile_min_y_utm - 2 * margin_m,
@@ -3531,36 +3879,20 @@ def _create_ocean_mask(shapefile, margin_km, scratch_dir,
             # add margin to polygon
             intersection_polygon = intersection_polygon.Buffer(margin_m)
 
-            # Update feature with intersected polygon
-            feature.SetGeometry(intersection_polygon)
-
-            # Set up the shapefile driver 
-            shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
+            # add intersected polygon to the in-memory layer
+            out_feature = ogr.Feature(out_layer_defn)
+            out_feature.SetGeometry(intersection_polygon)
+            out_layer.CreateFeature(out_feature)
+            out_feature = None
 
-            temp_shapefile_filename = tempfile.NamedTemporaryFile(
-                dir=scratch_dir, suffix='.shp').name
-
-            out_ds = shapefile_driver.CreateDataSource(temp_shapefile_filename)
-            out_layer = out_ds.CreateLayer("polygon", tile_srs, ogr.wkbPolygon)
-            out_layer.CreateFeature(feature)
-
-            gdal_ds = \
-                gdal.GetDriverByName('MEM').Create('', width, length, gdal.GDT_Byte)
-            gdal_ds.SetGeoTransform(geotransform)
-            gdal_ds.SetProjection(projection)
-            gdal.RasterizeLayer(gdal_ds, [1], out_layer, burn_values=[1])
-            current_ocean_mask = gdal_ds.ReadAsArray()
-            gdal_ds = None
-
-            if temp_files_list is not None:
-                for extension in ['.shp', '.prj', '.dbf', '.shx']:
-                    temp_file = temp_shapefile_filename.replace(
-                        '.shp', extension)
-                    if not os.path.isfile(temp_file):
-                        continue
-                    temp_files_list.append(temp_file)
-
-            ocean_mask |= current_ocean_mask
+    gdal_ds = \
+        gdal.GetDriverByName('MEM').Create('', width, length, gdal.GDT_Byte)
+    gdal_ds.SetGeoTransform(geotransform)
+    gdal_ds.SetProjection(projection)
+    gdal.RasterizeLayer(gdal_ds, [1], out_layer, burn_values=[1])
+    ocean_mask = gdal_ds.ReadAsArray()
+    gdal_ds = None
+    out_ds = None
 
     return ocean_mask
 
@@ -4233,7 +4565,7 @@ def _compute_opera_shadow_layer(dem, sun_azimuth_angle, sun_elevation_angle,
        Returns
        -------
        shadow_mask : numpy.ndarray
-              Shadow mask (1: not shadow, 0: shadow)
+              Shadow mask with dtype of uint8 (1: not shadow, 0: shadow)
     """
     sun_azimuth = np.radians(sun_azimuth_angle)
     sun_zenith_degrees = 90 - sun_elevation_angle
@@ -4271,9 +4603,11 @@ def _compute_opera_shadow_layer(dem, sun_azimuth_angle, sun_elevation_angle,
 
     backslope_mask = directional_slope_angle <= min_slope_angle
     low_sun_inc_angle_mask = sun_inc_angle_degrees <= max_sun_local_inc_angle
-    shadow_mask = (low_sun_inc_angle_mask | (~ backslope_mask))
+    shadow_mask = np.logical_not(backslope_mask, out=backslope_mask)
+    shadow_mask |= low_sun_inc_angle_mask
 
-    return shadow_mask
+    # return the boolean mask as uint8 through a zero-copy view
+    return shadow_mask.view(np.uint8)
 
 
 def _get_binary_representation(diagnostic_layer_decimal, nbits=6):
@@ -4295,17 +4629,22 @@ def _get_binary_representation(diagnostic_layer_decimal, nbits=6):
               Diagnostic layer in binary representation
     """
 
-    diagnostic_layer_binary = np.zeros_like(diagnostic_layer_decimal,
-                                            dtype=np.uint16)
-    for i in range(nbits):
-        diagnostic_layer_decimal, bit_array = \
-            np.divmod(diagnostic_layer_decimal, 2)
-        if i < 5:
-            diagnostic_layer_binary += bit_array * (10 ** i)
-        else:
-            # UInt16 max value is 65535
-            diagnostic_layer_binary[np.where(bit_array)] = \
+    # Build a lookup table with the binary representation of all `nbits`
+    # values. Values with any bit other than the five test bits set are
+    # marked as no data (UInt16 max value is 65535)
+    n_test_bits = 5
+    lut_size = 1 << nbits
+    binary_representation_lut = np.zeros(lut_size, dtype=np.uint16)
+    for value in range(lut_size):
+        if value >> n_test_bits:
+            binary_representation_lut[value] = \
                 DIAGNOSTIC_LAYER_NO_DATA_BINARY_REPR
+        else:
+            binary_representation_lut[value] = int(f'{value:b}')
+
+    # bits above `nbits` are ignored
+    diagnostic_layer_binary = binary_representation_lut[
+        diagnostic_layer_decimal & (lut_size - 1)]
 
     return diagnostic_layer_binary
 
@@ -5089,9 +5428,8 @@ def generate_dswx_layers(input_list,
     if shoreline_shapefile is not None:
         ocean_mask = _create_ocean_mask(shoreline_shapefile,
                                         ocean_masking_shoreline_distance_km,
-                                        scratch_dir, geotransform, projection,
-                                        length, width,
-                                        temp_files_list=temp_files_list)
+                                        geotransform, projection,
+                                        length, width)
 
         # update valid_array
         valid_array = np.logical_and(valid_array, ocean_mask)
@@ -5398,9 +5736,12 @@ def generate_dswx_layers(input_list,
 
     logger.info('removing temporary files:')
     for filename in temp_files_list:
-        if not os.path.isfile(filename):
+        # remove directly rather than testing for the file first
+        # (one system call instead of two)
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
             continue
-        os.remove(filename)
         logger.info(f'    {filename}')
 
     logger.info('output files:')
@@ -2,7 +2,12 @@
 
 import numpy as np
 from proteus.dswx_hls import interpreted_dswx_band_dict,\
-                             generate_interpreted_layer
+                             generate_interpreted_layer,\
+                             decimate_by_summation,\
+                             HlsThresholds,\
+                             _compute_diagnostic_tests,\
+                             _get_binary_representation,\
+                             _isin
 
 def test_units():
 
@@ -26,3 +31,98 @@ def test_units():
 
     # compare both arrays
     assert np.array_equal(output_array, expected_output_array)
+
+
+def test_decimate_by_summation():
+
+    # declare a 6 x 9 input array that is decimated into 2 x 3 windows
+    # of 3 x 3 pixels
+    input_array = np.arange(6 * 9, dtype=np.uint16).reshape(6, 9)
+
+    # compute the expected output summing each window explicitly
+    expected_output_array = np.zeros((2, 3), dtype=np.uint16)
+    for i in range(2):
+        for j in range(3):
+            expected_output_array[i, j] = np.sum(
+                input_array[3 * i:3 * (i + 1), 3 * j:3 * (j + 1)])
+
+    # run DSWx-HLS function to decimate the array by summation
+    output_array = decimate_by_summation(input_array, 3, 3)
+
+    # compare both arrays
+    assert output_array.dtype == input_array.dtype
+    assert np.array_equal(output_array, expected_output_array)
+
+
+def test_compute_diagnostic_tests_blocks():
+
+    # declare random reflectance arrays with a number of lines that is not
+    # a multiple of the block size
+    length = 23
+    width = 11
+    rng = np.random.default_rng(0)
+    blue, green, red, nir, swir1, swir2 = \
+        rng.uniform(0.0001, 0.5, (6, length, width)).astype(np.float32)
+
+    hls_thresholds = HlsThresholds()
+    hls_thresholds.wigt = 0.124
+    hls_thresholds.awgt = 0
+    hls_thresholds.pswt_1_mndwi = -0.44
+    hls_thresholds.pswt_1_nir = 0.15
+    hls_thresholds.pswt_1_swir1 = 0.09
+    hls_thresholds.pswt_1_ndvi = 0.7
+    hls_thresholds.pswt_2_mndwi = -0.5
+    hls_thresholds.pswt_2_blue = 0.1
+    hls_thresholds.pswt_2_nir = 0.25
+    hls_thresholds.pswt_2_swir1 = 0.3
+    hls_thresholds.pswt_2_swir2 = 0.1
+
+    # compute the diagnostic tests over a single block and over
+    # multiple blocks
+    expected_output_array = _compute_diagnostic_tests(
+        blue, green, red, nir, swir1, swir2, hls_thresholds,
+        block_nlines=length)
+    output_array = _compute_diagnostic_tests(
+        blue, green, red, nir, swir1, swir2, hls_thresholds,
+        block_nlines=5)
+
+    # compare both arrays
+    assert np.any(expected_output_array)
+    assert np.array_equal(output_array, expected_output_array)
+
+
+def test_get_binary_representation():
+
+    # declare input array with all test-bit combinations (0 to 31) and
+    # values with the no-data bit (32) set
+    input_array = np.arange(64, dtype=np.uint8).reshape(8, 8)
+
+    # declare expected output array writing each value in binary digits
+    expected_output_array = np.zeros(input_array.shape, dtype=np.uint16)
+    for i in range(input_array.shape[0]):
+        for j in range(input_array.shape[1]):
+            value = int(input_array[i, j])
+            if value >= 32:
+                expected_output_array[i, j] = 65535
+            else:
+                expected_output_array[i, j] = int(bin(value)[2:])
+
+    # run DSWx-HLS function to get the binary representation
+    output_array = _get_binary_representation(input_array)
+
+    # compare both arrays
+    assert output_array.dtype == np.uint16
+    assert np.array_equal(output_array, expected_output_array)
+
+
+def test_isin():
+
+    values = [0, 3, 200, 255, 300]
+
+    # compare the lookup-table (uint8 and uint16) and np.isin()
+    # (int16) paths with np.isin()
+    for dtype in [np.uint8, np.uint16, np.int16]:
+        input_array = np.arange(256, dtype=dtype).reshape(16, 16)
+        expected_output_array = np.isin(input_array, values)
+        output_array = _isin(input_array, values)
+        assert np.array_equal(output_array, expected_output_array)
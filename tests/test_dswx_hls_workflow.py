@@ -4,6 +4,7 @@ import os
 import requests
 import glob
 import tarfile
+from proteus.core import set_gdal_config_options
 from proteus.dswx_hls import (
     get_dswx_hls_cli_parser,
     generate_dswx_layers,
@@ -53,6 +54,7 @@ def test_workflow():
     args = parser.parse_args([user_runconfig_file])
 
     create_logger(args.log_file)
+    set_gdal_config_options()
 
     runconfig_constants = parse_runconfig_file(
         user_runconfig_file = user_runconfig_file, args = args)